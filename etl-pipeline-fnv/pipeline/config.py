@@ -4,18 +4,18 @@ from dataclasses import dataclass
 from pathlib import Path
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SupabaseSettings:
     url: str
     service_role_key: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OpenAISettings:
     api_key: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ProcessingSettings:
     embed_model: str
     embed_dim: int
@@ -23,16 +23,17 @@ class ProcessingSettings:
     embed_batch: int
     upsert_batch: int
     sleep_s: float
+    max_inflight: int = 5
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IngestSettings:
     storage_bucket: str
     manifest_path: Path
     data_dir: Path
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ScrapeSettings:
     base_url: str
     start_url: str
@@ -2,63 +2,78 @@
 
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+import bisect
+from typing import Iterator, List, Tuple
 
 import fitz  # PyMuPDF
 
-def extract_text_with_page_map(pdf_bytes: bytes) -> Tuple[str, List[Tuple[int, int, int]]]:
-    """
-    Returns:
-      - full_text: concatenated text
-      - page_spans: list of (page_index, start_char, end_char) in full_text
+_NUL_TRANS = str.maketrans({"\x00": " "})
+
 
-    This allows you to store page_start/page_end per chunk cheaply.
+def _cut_point(buf: str, chunk_chars: int) -> int:
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    parts: List[str] = []
-    spans: List[Tuple[int, int, int]] = []
-    cursor = 0
+    Where to cut the next chunk out of `buf`: after the last whitespace
+    within the window, so words are not split mid-chunk; hard cut at
+    chunk_chars when the window has no whitespace at all.
+    """
+    cut = max(buf.rfind(c, 0, chunk_chars + 1) for c in " \n\t")
+    if cut <= 0:
+        return chunk_chars
+    return cut + 1
 
-    for i, page in enumerate(doc):
-        t = page.get_text("text") or ""
-        parts.append(t)
-        start = cursor
-        cursor += len(t)
-        end = cursor
-        spans.append((i + 1, start, end))  # 1-based page number
-    doc.close()
 
-    full_text = "".join(parts).replace("\x00", " ")
-    return full_text, spans
+def iter_chunks(pdf_bytes: bytes, chunk_chars: int) -> Iterator[Tuple[int, int, int, int, str]]:
+    """
+    Stream a PDF into fixed-size character chunks.
 
+    Yields (char_start, char_end, page_start, page_end, chunk_text) in
+    document order without materializing the full text: pages are read one
+    at a time into a rolling buffer and a chunk is emitted as soon as
+    enough text has accumulated, so peak memory is O(chunk_chars + page)
+    instead of O(document).
 
-def chunk_text(text: str, chunk_chars: int) -> List[Tuple[int, int, str]]:
-    """
-    Returns list of (char_start, char_end, chunk_text).
-    Character chunking is deterministic and simple.
+    Offsets are relative to the concatenated page text; page numbers are
+    1-based. Character chunking is deterministic and simple.
     """
-    text = text.strip()
-    chunks: List[Tuple[int, int, str]] = []
-    for i in range(0, len(text), chunk_chars):
-        piece = text[i:i + chunk_chars].strip()
-        if not piece:
-            continue
-        chunks.append((i, i + len(piece), piece))
-    return chunks
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        buf = ""
+        start = 0  # offset of buf[0] in the concatenated text
+        total = 0
+        page_ends: List[int] = []  # cumulative end offset per page
 
+        def page_range(char_start: int, char_end: int) -> Tuple[int, int]:
+            # Two C-level binary searches over the cumulative ends instead
+            # of Python-level scans per chunk.
+            last = len(page_ends)
+            p_start = min(bisect.bisect_right(page_ends, char_start) + 1, last)
+            p_end = min(bisect.bisect_right(page_ends, char_end - 1) + 1, last)
+            return p_start, p_end
 
-def pages_for_chunk(page_spans: List[Tuple[int, int, int]], char_start: int, char_end: int) -> Tuple[Optional[int], Optional[int]]:
-    """
-    Map chunk [char_start, char_end) to page range.
-    """
-    p_start = None
-    p_end = None
-    for page_no, s, e in page_spans:
-        if e <= char_start:
-            continue
-        if s >= char_end:
-            break
-        if p_start is None:
-            p_start = page_no
-        p_end = page_no
-    return p_start, p_end
+        def emit(raw: str, raw_start: int) -> Iterator[Tuple[int, int, int, int, str]]:
+            piece = raw.strip()
+            if not piece:
+                return
+            # Account for stripped leading whitespace so [char_start,
+            # char_end) maps back into the concatenated page text exactly.
+            char_start = raw_start + (len(raw) - len(raw.lstrip()))
+            char_end = char_start + len(piece)
+            p_start, p_end = page_range(char_start, char_end)
+            yield (char_start, char_end, p_start, p_end, piece)
+
+        for page in doc:
+            t = (page.get_text("text") or "").translate(_NUL_TRANS)
+            total += len(t)
+            page_ends.append(total)
+            buf += t
+
+            while len(buf) >= chunk_chars:
+                cut = _cut_point(buf, chunk_chars)
+                raw, buf = buf[:cut], buf[cut:]
+                yield from emit(raw, start)
+                start += cut
+
+        if buf:
+            yield from emit(buf, start)
+    finally:
+        doc.close()
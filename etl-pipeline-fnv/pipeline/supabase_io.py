@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from supabase import Client
 
@@ -24,7 +25,7 @@ def iter_documents_to_process(
     limit: int,
 ) -> List[dict]:
     q = supabase.table("cao_documents").select(
-        "cao_id,cao_name,storage_bucket,storage_path,processed_at"
+        "cao_id,cao_name,storage_bucket,storage_path,file_sha256,processed_sha256,processed_at"
     )
     if only_unprocessed:
         q = q.is_("processed_at", "null")
@@ -34,9 +35,48 @@ def iter_documents_to_process(
 
 
 def upsert_chunks(supabase: Client, rows: List[dict], batch: int) -> None:
-    for i in range(0, len(rows), batch):
-        supabase.table("cao_chunks").upsert(rows[i:i + batch]).execute()
+    slices = [rows[i:i + batch] for i in range(0, len(rows), batch)]
+    if len(slices) == 1:
+        supabase.table("cao_chunks").upsert(slices[0]).execute()
+        return
+    # chunk_id is the conflict key, so concurrent batches stay idempotent.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda sl: supabase.table("cao_chunks").upsert(sl).execute(), slices))
 
 
-def mark_processed(supabase: Client, cao_id: str) -> None:
-    supabase.table("cao_documents").update({"processed_at": "now()"}).eq("cao_id", cao_id).execute()
+def fetch_embeddings_by_hash(supabase: Client, shas: List[str], batch: int = 200) -> Dict[str, object]:
+    """
+    Look up existing embeddings for chunk content fingerprints.
+    Returns {content_sha: embedding} for the hashes that are already stored.
+    """
+    found: Dict[str, object] = {}
+    for i in range(0, len(shas), batch):
+        res = (
+            supabase.table("cao_chunks")
+            .select("content_sha,embedding")
+            .in_("content_sha", shas[i:i + batch])
+            .execute()
+        )
+        for row in res.data or []:
+            found[row["content_sha"]] = row["embedding"]
+    return found
+
+
+def mark_processed(supabase: Client, cao_id: str, file_sha256: Optional[str] = None) -> None:
+    update = {"processed_at": "now()"}
+    if file_sha256:
+        update["processed_sha256"] = file_sha256
+    supabase.table("cao_documents").update(update).eq("cao_id", cao_id).execute()
+
+
+def mark_many_processed(supabase: Client, marks: List[Tuple[str, Optional[str]]]) -> None:
+    """
+    Mark a batch of (cao_id, file_sha256) pairs processed. processed_sha256
+    differs per document so one UPDATE per doc is unavoidable, but issuing
+    them concurrently at end of run beats one round-trip per document
+    inline.
+    """
+    if not marks:
+        return
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda m: mark_processed(supabase, m[0], m[1]), marks))
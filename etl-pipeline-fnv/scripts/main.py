@@ -24,6 +24,7 @@ import logging
 import os
 from pathlib import Path
 
+import httpx
 from openai import OpenAI
 from supabase import create_client
 
@@ -57,9 +58,10 @@ def main() -> int:
     parser.add_argument("--chunk-chars", type=int, default=500)
     parser.add_argument("--embed-model", default="text-embedding-3-small")
     parser.add_argument("--embed-dim", type=int, default=1536)
-    parser.add_argument("--embed-batch", type=int, default=128)
+    parser.add_argument("--embed-batch", type=int, default=2048, help="Max chunks per embedding request (API caps at 2048); the ~250k token budget usually binds first")
     parser.add_argument("--upsert-batch", type=int, default=200)
     parser.add_argument("--sleep-s", type=float, default=0.2)
+    parser.add_argument("--max-inflight", type=int, default=5, help="Concurrent embedding requests (keep within your OpenAI tier)")
     parser.add_argument("--log-level", default="INFO")
     args = parser.parse_args()
 
@@ -77,10 +79,20 @@ def main() -> int:
         embed_batch=args.embed_batch,
         upsert_batch=args.upsert_batch,
         sleep_s=args.sleep_s,
+        max_inflight=args.max_inflight,
     )
 
     supabase = create_client(supabase_settings.url, supabase_settings.service_role_key)
-    openai_client = OpenAI(api_key=openai_settings.api_key)
+    # HTTP/2 multiplexes the concurrent embedding batches over one warm
+    # connection, avoiding a TLS handshake per in-flight request.
+    openai_client = OpenAI(
+        api_key=openai_settings.api_key,
+        http_client=httpx.Client(
+            http2=True,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        ),
+    )
 
     process_documents(
         supabase,
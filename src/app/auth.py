@@ -1,6 +1,8 @@
 # auth.py
 from __future__ import annotations
 
+import hmac
+
 import streamlit as st
 
 
@@ -29,7 +31,7 @@ def require_password(app_title: str = "CAO App") -> None:
 
     st.title(app_title)
     entered = st.text_input("Wachtwoord", type="password")
-    if entered and entered == pwd:
+    if entered and hmac.compare_digest(entered.encode("utf-8"), pwd.encode("utf-8")):
         st.session_state["authed"] = True
         st.rerun()
 
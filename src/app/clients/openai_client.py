@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import List
+
 import streamlit as st
 from openai import OpenAI
 
@@ -9,3 +11,12 @@ from core.settings import OpenAISettings
 @st.cache_resource
 def get_openai_client(settings: OpenAISettings) -> OpenAI:
     return OpenAI(api_key=settings.api_key)
+
+
+@st.cache_data(ttl=6 * 3600, max_entries=1024, show_spinner=False)
+def embed_query_cached(_client: OpenAI, model: str, text: str) -> List[float]:
+    # Keyed on (model, text); the underscore keeps Streamlit from trying to
+    # hash the client. Re-running the same query or toggling filters no
+    # longer costs an embeddings round-trip.
+    resp = _client.embeddings.create(model=model, input=text)
+    return resp.data[0].embedding
@@ -1,31 +1,42 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from typing import Any, Mapping
 
+import streamlit as st
+
 from core.errors import MissingConfigError
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SupabaseSettings:
     url: str
     anon_key: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OpenAISettings:
     api_key: str
     embedding_model: str
     chat_model: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppSettings:
     supabase: SupabaseSettings
     openai: OpenAISettings
     rpc_match_fn: str
 
 
+def _pick(*sources_keys: tuple[Mapping[str, Any], str], default: str = "") -> str:
+    for src, key in sources_keys:
+        value = src.get(key)
+        if value:
+            return value
+    return default
+
+
 def load_settings(
     secrets: Mapping[str, Any],
     env: Mapping[str, str],
@@ -38,17 +49,24 @@ def load_settings(
     oai = secrets.get("openai", {})
 
     supabase = SupabaseSettings(
-        url=supa.get("url") or env.get("SUPABASE_URL", ""),
-        anon_key=supa.get("anon_key") or env.get("SUPABASE_ANON_KEY", ""),
+        url=_pick((supa, "url"), (env, "SUPABASE_URL")),
+        anon_key=_pick((supa, "anon_key"), (env, "SUPABASE_ANON_KEY")),
     )
     openai = OpenAISettings(
-        api_key=oai.get("api_key") or env.get("OPENAI_API_KEY", ""),
+        api_key=_pick((oai, "api_key"), (env, "OPENAI_API_KEY")),
         embedding_model=embedding_model,
         chat_model=chat_model,
     )
     return AppSettings(supabase=supabase, openai=openai, rpc_match_fn=rpc_match_fn)
 
 
+@st.cache_resource(show_spinner=False)
+def get_app_settings() -> AppSettings:
+    # Settings are immutable for the lifetime of the process, so resolve
+    # st.secrets/os.environ once instead of on every Streamlit rerun.
+    return load_settings(st.secrets, os.environ)
+
+
 def require_supabase(settings: SupabaseSettings) -> None:
     if not settings.url or not settings.anon_key:
         raise MissingConfigError(
@@ -1,33 +1,19 @@
 # search.py
 from __future__ import annotations
 
-import os
-from typing import Any, Dict, List
-
 import streamlit as st
 
 from clients.openai_client import get_openai_client
 from clients.supabase_client import get_supabase_client
 from core.errors import MissingConfigError
-from core.settings import load_settings, require_openai, require_supabase
+from core.settings import get_app_settings, require_openai, require_supabase
 from services.search_service import SearchService
-
-def render_result(row: Dict[str, Any]) -> None:
-    dist = row.get("distance")
-    dist_txt = f"{dist:.4f}" if isinstance(dist, (int, float)) else str(dist)
-    meta = (
-        f"cao_id={row.get('cao_id')} | chunk={row.get('chunk_index')} | "
-        f"pages={row.get('page_start')}-{row.get('page_end')} | "
-        f"distance={dist_txt}"
-    )
-    st.markdown(f"**{meta}**")
-    st.write(row.get("chunk_content", ""))
-    st.divider()
-
+from state import set_last_search
+from ui_components import render_search_result
 
 def run_search_page() -> None:
     try:
-        settings = load_settings(st.secrets, os.environ)
+        settings = get_app_settings()
         require_supabase(settings.supabase)
         require_openai(settings.openai)
     except MissingConfigError as exc:
@@ -49,9 +35,14 @@ def run_search_page() -> None:
     with st.sidebar:
         st.subheader("Filters")
         docs = service.list_documents()
-        options = [("Alle CAO's", None)] + [(f"{d['cao_name']} ({d['cao_id']})", d["cao_id"]) for d in docs]
-        label_to_id = {label: cid for label, cid in options}
-        selected_label = st.selectbox("CAO", [x[0] for x in options], index=0)
+        # One pass: build the labels and the label->id lookup together.
+        labels = ["Alle CAO's"]
+        label_to_id = {"Alle CAO's": None}
+        for d in docs:
+            label = f"{d['cao_name']} ({d['cao_id']})"
+            labels.append(label)
+            label_to_id[label] = d["cao_id"]
+        selected_label = st.selectbox("CAO", labels, index=0)
         filter_cao_id = label_to_id[selected_label]
         k = st.slider("Top K", min_value=5, max_value=50, value=12, step=1)
 
@@ -61,6 +52,7 @@ def run_search_page() -> None:
 
     qvec = service.embed_query(query)
     rows = service.match_chunks(query_embedding=qvec, k=k, cao_id=filter_cao_id)
+    set_last_search(query, filter_cao_id, rows)
 
     st.subheader("Resultaten")
     if not rows:
@@ -68,4 +60,4 @@ def run_search_page() -> None:
         st.stop()
 
     for r in rows:
-        render_result(r)
+        render_search_result(r)
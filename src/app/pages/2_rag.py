@@ -1,15 +1,14 @@
 # rag.py
 from __future__ import annotations
 
-import os
-
 import streamlit as st
 
 from clients.openai_client import get_openai_client
 from clients.supabase_client import get_supabase_client
 from core.errors import MissingConfigError
-from core.settings import load_settings, require_openai, require_supabase
+from core.settings import get_app_settings, require_openai, require_supabase
 from services.rag_service import RagService
+from ui_components import render_evidence_card
 
 DEFAULT_SYSTEM = """Je bent een analyst die uitsluitend conclusies trekt uit de aangeleverde bronnen.
 Regels:
@@ -26,7 +25,7 @@ Output:
 
 def run_rag_page() -> None:
     try:
-        settings = load_settings(st.secrets, os.environ)
+        settings = get_app_settings()
         require_supabase(settings.supabase)
         require_openai(settings.openai)
     except MissingConfigError as exc:
@@ -49,9 +48,14 @@ def run_rag_page() -> None:
     with st.sidebar:
         st.subheader("Scope")
         docs = service.list_documents()
-        options = [("Alle CAO's", None)] + [(f"{d['cao_name']} ({d['cao_id']})", d["cao_id"]) for d in docs]
-        label_to_id = {label: cid for label, cid in options}
-        selected_label = st.selectbox("CAO", [x[0] for x in options], index=0)
+        # One pass: build the labels and the label->id lookup together.
+        labels = ["Alle CAO's"]
+        label_to_id = {"Alle CAO's": None}
+        for d in docs:
+            label = f"{d['cao_name']} ({d['cao_id']})"
+            labels.append(label)
+            label_to_id[label] = d["cao_id"]
+        selected_label = st.selectbox("CAO", labels, index=0)
         filter_cao_id = label_to_id[selected_label]
 
         k = st.slider("Context chunks", min_value=6, max_value=40, value=16, step=1)
@@ -69,20 +73,14 @@ def run_rag_page() -> None:
 
     sources = service.build_sources_context(rows)
 
-    with st.spinner("Genereren..."):
-        answer = service.generate_answer(question, system_rules, sources)
-
     st.subheader("Antwoord")
+    # Render tokens as they arrive; the citation check runs on the full text.
+    answer = st.write_stream(service.stream_answer(question, system_rules, sources)) or ""
+
     ok = service.citation_check(answer, n_sources=len(rows))
     if not ok:
         st.warning("Uitvoer voldoet niet aan citation-contract (onvoldoende/ongeldige citations).")
-    st.write(answer)
 
     st.subheader("Bronnen")
     for i, r in enumerate(rows, 1):
-        st.markdown(
-            f"**[S{i}]** cao_id={r.get('cao_id')} | chunk={r.get('chunk_index')} | "
-            f"pages={r.get('page_start')}-{r.get('page_end')} | chunk_id={r.get('chunk_id')}"
-        )
-        st.write((r.get("chunk_content") or "").strip())
-        st.divider()
+        render_evidence_card(f"[S{i}]", r)
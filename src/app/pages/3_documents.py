@@ -1,18 +1,30 @@
 # documents.py
 from __future__ import annotations
 
-import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import pandas as pd
 import streamlit as st
 
 from clients.supabase_client import get_supabase_client
 from core.errors import MissingConfigError
-from core.settings import load_settings, require_supabase
+from core.settings import get_app_settings, require_supabase
 from services.documents_service import DocumentsService
 
+
+def _prefetch_chunk_preview(service: DocumentsService, cao_id: str, limit: int) -> None:
+    # Runs on a daemon thread purely to warm the st.cache_data entry; the
+    # result is discarded here and read from cache when the user arrives.
+    try:
+        service.chunk_preview(cao_id, limit)
+    except Exception:
+        pass
+
+
 def run_documents_page() -> None:
     try:
-        settings = load_settings(st.secrets, os.environ)
+        settings = get_app_settings()
         require_supabase(settings.supabase)
     except MissingConfigError as exc:
         st.error(str(exc))
@@ -24,16 +36,15 @@ def run_documents_page() -> None:
     st.title("Documents")
     st.caption("Overzicht van CAO-PDF’s in Supabase + verwerkingsstatus + chunks.")
 
-    docs = service.list_documents()
+    q = st.text_input("Filter op naam of cao_id", value="")
+
+    # With a filter, Postgres does the matching and only hits cross the
+    # wire; without one, the cached full list is used as before.
+    docs = service.search_documents(q.strip()) if q.strip() else service.list_documents()
     if not docs:
         st.info("Geen documenten gevonden.")
         st.stop()
 
-    q = st.text_input("Filter op naam of cao_id", value="")
-    if q:
-        ql = q.lower().strip()
-        docs = [d for d in docs if ql in (d.get("cao_name") or "").lower() or ql in (d.get("cao_id") or "").lower()]
-
     selected = st.selectbox(
         "Selecteer CAO",
         options=docs,
@@ -44,41 +55,71 @@ def run_documents_page() -> None:
 
     cao_id = selected["cao_id"]
 
+    # The list only carries id/name; heavy columns load for the selection.
+    detail = service.get_document(cao_id) or selected
+    bucket = detail.get("storage_bucket")
+    path = detail.get("storage_path")
+
+    # The URL resolution and the batched counts are independent I/O, so
+    # issue them together while the metadata section renders; each result
+    # is awaited where its section needs it.
+    pool = ThreadPoolExecutor(max_workers=2)
+    url_future = pool.submit(service.get_pdf_url, bucket, path) if bucket and path else None
+    counts_future = pool.submit(service.chunk_counts, [d["cao_id"] for d in docs])
+
     st.subheader("Metadata")
     st.write(
         {
             "cao_id": cao_id,
-            "cao_name": selected.get("cao_name"),
-            "source_url": selected.get("source_url"),
-            "storage_bucket": selected.get("storage_bucket"),
-            "storage_path": selected.get("storage_path"),
-            "file_bytes": selected.get("file_bytes"),
-            "file_sha256": selected.get("file_sha256"),
-            "ingested_at": selected.get("ingested_at"),
-            "processed_at": selected.get("processed_at"),
+            "cao_name": detail.get("cao_name"),
+            "source_url": detail.get("source_url"),
+            "storage_bucket": bucket,
+            "storage_path": path,
+            "file_bytes": detail.get("file_bytes"),
+            "file_sha256": detail.get("file_sha256"),
+            "ingested_at": detail.get("ingested_at"),
+            "processed_at": detail.get("processed_at"),
         }
     )
 
     st.subheader("PDF")
-    bucket = selected.get("storage_bucket")
-    path = selected.get("storage_path")
-    if bucket and path:
-        url = service.get_pdf_url(bucket, path)
+    if url_future is not None:
+        url = url_future.result()
         if url:
             st.link_button("Open PDF", url)
         else:
             st.info("Geen (public/signed) URL beschikbaar met huidige credentials/policies.")
 
     st.subheader("Chunks")
-    cnt = service.chunk_count(cao_id)
-    st.write({"chunk_count": cnt})
+    st.write({"chunk_count": counts_future.result().get(cao_id, 0)})
+    pool.shutdown(wait=False)
 
     preview_n = st.slider("Preview chunks", min_value=3, max_value=30, value=10, step=1)
     rows = service.chunk_preview(cao_id, preview_n)
 
-    for r in rows:
-        st.markdown(
-            f"**chunk={r.get('chunk_index')} | pages={r.get('page_start')}-{r.get('page_end')} | chunk_id={r.get('chunk_id')}**"
-        )
-        st.write((r.get("chunk_content") or "").strip())
-        st.divider()
+    # While the user reads this preview, warm the cache for the next
+    # document in the list so sequential browsing feels instant.
+    idx = next((i for i, d in enumerate(docs) if d["cao_id"] == cao_id), None)
+    if idx is not None and idx + 1 < len(docs):
+        next_id = docs[idx + 1]["cao_id"]
+        prefetched = st.session_state.setdefault("_preview_prefetched", set())
+        if (next_id, preview_n) not in prefetched:
+            prefetched.add((next_id, preview_n))
+            threading.Thread(
+                target=_prefetch_chunk_preview,
+                args=(service, next_id, preview_n),
+                daemon=True,
+            ).start()
+
+    # One Arrow-framed dataframe instead of three widget messages per row;
+    # the per-chunk markdown view stays available behind a toggle.
+    if st.toggle("Toon chunks als tekst", value=False):
+        for r in rows:
+            st.markdown(
+                f"**chunk={r.get('chunk_index')} | pages={r.get('page_start')}-{r.get('page_end')} | chunk_id={r.get('chunk_id')}**"
+            )
+            st.write((r.get("chunk_content") or "").strip())
+            st.divider()
+    else:
+        df = pd.DataFrame(rows, columns=["chunk_index", "page_start", "page_end", "chunk_id", "chunk_content"])
+        st.dataframe(df, use_container_width=True, hide_index=True)
@@ -2,68 +2,147 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
+import streamlit as st
 from supabase import Client
 
+# Sidebar/render-path queries cached across reruns; the underscore keeps
+# Streamlit from hashing the client object. The document list changes only
+# when the ETL runs, so it gets an hour; counts and previews get a minute
+# so a run in progress shows up quickly.
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _list_documents_cached(_supabase: Client, limit: int) -> List[Dict[str, Any]]:
+    # List projection: only what the selectbox renders. Heavy columns come
+    # from _get_document_cached once a document is selected.
+    res = (
+        _supabase.table("cao_documents")
+        .select("cao_id,cao_name,processed_at")
+        .order("cao_name")
+        .limit(limit)
+        .execute()
+    )
+    return res.data or []
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _search_documents_cached(_supabase: Client, q: str, limit: int) -> List[Dict[str, Any]]:
+    # PostgREST or= syntax uses commas and parens as separators, so they
+    # cannot appear in the pattern itself.
+    pattern = "%" + q.translate(str.maketrans({",": " ", "(": " ", ")": " "})) + "%"
+    res = (
+        _supabase.table("cao_documents")
+        .select("cao_id,cao_name,processed_at")
+        .or_(f"cao_name.ilike.{pattern},cao_id.ilike.{pattern}")
+        .order("cao_name")
+        .limit(limit)
+        .execute()
+    )
+    return res.data or []
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _get_document_cached(_supabase: Client, cao_id: str) -> Optional[Dict[str, Any]]:
+    res = (
+        _supabase.table("cao_documents")
+        .select("cao_id,cao_name,source_url,storage_bucket,storage_path,file_sha256,file_bytes,processed_at,ingested_at")
+        .eq("cao_id", cao_id)
+        .limit(1)
+        .execute()
+    )
+    rows = res.data or []
+    return rows[0] if rows else None
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _chunk_count_cached(_supabase: Client, cao_id: str) -> int:
+    res = (
+        _supabase.table("cao_chunks")
+        .select("chunk_id", count="exact")
+        .eq("cao_id", cao_id)
+        .limit(1)
+        .execute()
+    )
+    return int(res.count or 0)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _chunk_counts_cached(_supabase: Client, cao_ids: tuple) -> Dict[str, int]:
+    res = _supabase.rpc("cao_chunk_counts", {"ids": list(cao_ids)}).execute()
+    return {row["cao_id"]: int(row["chunk_count"]) for row in res.data or []}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _chunk_preview_cached(_supabase: Client, cao_id: str, limit: int) -> List[Dict[str, Any]]:
+    return (
+        _supabase.table("cao_chunks")
+        .select("chunk_id,chunk_index,page_start,page_end,chunk_content")
+        .eq("cao_id", cao_id)
+        .order("chunk_index")
+        .limit(limit)
+        .execute()
+        .data
+        or []
+    )
+
+
+@st.cache_data(ttl=55 * 60, show_spinner=False)
+def _pdf_url_cached(_supabase: Client, bucket: str, path: str) -> Optional[str]:
+    # TTL just under the 60-minute signed-URL lifetime, so a cached URL is
+    # never handed out expired.
+    storage = _supabase.storage.from_(bucket)
+
+    try:
+        pub = storage.get_public_url(path)
+        if isinstance(pub, dict):
+            url = pub.get("publicUrl") or pub.get("data", {}).get("publicUrl")
+            if url:
+                return url
+        if isinstance(pub, str):
+            return pub
+    except Exception:
+        pass
+
+    try:
+        signed = storage.create_signed_url(path, 60 * 60)
+        if isinstance(signed, dict):
+            url = signed.get("signedUrl") or signed.get("data", {}).get("signedUrl")
+            if url:
+                return url
+        if isinstance(signed, str):
+            return signed
+    except Exception:
+        pass
+
+    return None
+
 
 class DocumentsService:
     def __init__(self, supabase: Client) -> None:
         self._supabase = supabase
 
     def list_documents(self, limit: int = 2000) -> List[Dict[str, Any]]:
-        res = (
-            self._supabase.table("cao_documents")
-            .select("cao_id,cao_name,source_url,storage_bucket,storage_path,file_sha256,file_bytes,processed_at,ingested_at")
-            .order("cao_name")
-            .limit(limit)
-            .execute()
-        )
-        return res.data or []
+        return _list_documents_cached(self._supabase, limit)
+
+    def search_documents(self, q: str, limit: int = 2000) -> List[Dict[str, Any]]:
+        """Case-insensitive match on cao_name or cao_id, filtered in Postgres."""
+        return _search_documents_cached(self._supabase, q, limit)
+
+    def get_document(self, cao_id: str) -> Optional[Dict[str, Any]]:
+        """Full metadata row for one document (detail projection)."""
+        return _get_document_cached(self._supabase, cao_id)
 
     def chunk_count(self, cao_id: str) -> int:
-        res = (
-            self._supabase.table("cao_chunks")
-            .select("chunk_id", count="exact")
-            .eq("cao_id", cao_id)
-            .limit(1)
-            .execute()
-        )
-        return int(res.count or 0)
+        return _chunk_count_cached(self._supabase, cao_id)
+
+    def chunk_counts(self, cao_ids: List[str]) -> Dict[str, int]:
+        """Counts for many documents in one round-trip; absent ids mean 0 chunks."""
+        if not cao_ids:
+            return {}
+        return _chunk_counts_cached(self._supabase, tuple(cao_ids))
 
     def chunk_preview(self, cao_id: str, limit: int) -> List[Dict[str, Any]]:
-        return (
-            self._supabase.table("cao_chunks")
-            .select("chunk_id,chunk_index,page_start,page_end,chunk_content")
-            .eq("cao_id", cao_id)
-            .order("chunk_index")
-            .limit(limit)
-            .execute()
-            .data
-            or []
-        )
+        return _chunk_preview_cached(self._supabase, cao_id, limit)
 
     def get_pdf_url(self, bucket: str, path: str) -> Optional[str]:
-        storage = self._supabase.storage.from_(bucket)
-
-        try:
-            pub = storage.get_public_url(path)
-            if isinstance(pub, dict):
-                url = pub.get("publicUrl") or pub.get("data", {}).get("publicUrl")
-                if url:
-                    return url
-            if isinstance(pub, str):
-                return pub
-        except Exception:
-            pass
-
-        try:
-            signed = storage.create_signed_url(path, 60 * 60)
-            if isinstance(signed, dict):
-                url = signed.get("signedUrl") or signed.get("data", {}).get("signedUrl")
-                if url:
-                    return url
-            if isinstance(signed, str):
-                return signed
-        except Exception:
-            pass
-
-        return None
+        return _pdf_url_cached(self._supabase, bucket, path)
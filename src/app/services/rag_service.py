@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from openai import OpenAI
 from supabase import Client
 
+from services.vector_backend import VectorSearchBackend
+
+_CITATION_RE = re.compile(r"\[S(\d+)\]")
+
 
 class RagService:
     def __init__(
@@ -17,25 +21,23 @@ class RagService:
         chat_model: str,
         rpc_match_fn: str,
     ) -> None:
-        self._supabase = supabase
+        self._backend = VectorSearchBackend(
+            supabase,
+            openai_client,
+            embedding_model=embedding_model,
+            rpc_match_fn=rpc_match_fn,
+        )
         self._openai = openai_client
-        self._embedding_model = embedding_model
         self._chat_model = chat_model
-        self._rpc_match_fn = rpc_match_fn
 
     def list_documents(self, limit: int = 1000) -> List[Dict[str, Any]]:
-        res = (
-            self._supabase.table("cao_documents")
-            .select("cao_id,cao_name,processed_at")
-            .order("cao_name")
-            .limit(limit)
-            .execute()
-        )
-        return res.data or []
+        return self._backend.list_documents(limit)
 
     def embed_query(self, text: str) -> List[float]:
-        resp = self._openai.embeddings.create(model=self._embedding_model, input=text)
-        return resp.data[0].embedding
+        return self._backend.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._backend.embed_queries(texts)
 
     def match_chunks(
         self,
@@ -44,41 +46,46 @@ class RagService:
         k: int,
         cao_id: Optional[str],
     ) -> List[Dict[str, Any]]:
-        payload = {"query_embedding": query_embedding, "match_count": k, "filter_cao_id": cao_id}
-        res = self._supabase.rpc(self._rpc_match_fn, payload).execute()
-        return res.data or []
+        return self._backend.match_chunks(query_embedding=query_embedding, k=k, cao_id=cao_id)
 
     @staticmethod
     def build_sources_context(rows: List[Dict[str, Any]], max_chars: int = 12000) -> str:
+        # Fragments go straight into the list and are joined once at the
+        # end, so no row-level intermediate strings are built at all; the
+        # budget is tracked from fragment lengths.
         parts: List[str] = []
         used = 0
         for i, r in enumerate(rows, 1):
-            label = f"S{i}"
             header = (
-                f"[{label}] "
+                f"[S{i}] "
                 f"cao_id={r.get('cao_id')} | chunk_id={r.get('chunk_id')} | chunk_index={r.get('chunk_index')} | "
-                f"pages={r.get('page_start')}-{r.get('page_end')}"
+                f"pages={r.get('page_start')}-{r.get('page_end')}\n"
             )
             body = (r.get("chunk_content") or "").strip()
-            block = header + "\n" + body + "\n"
-            if used + len(block) > max_chars:
+            block_len = len(header) + len(body) + 1
+            if used + block_len > max_chars:
                 break
-            parts.append(block)
-            used += len(block)
-        return "\n".join(parts)
+            if parts:
+                parts.append("\n")
+            parts.append(header)
+            parts.append(body)
+            parts.append("\n")
+            used += block_len
+        return "".join(parts)
 
     @staticmethod
     def citation_check(text: str, n_sources: int) -> bool:
         if "[S" not in text:
             return False
-        for m in re.findall(r"\[S(\d+)\]", text):
-            idx = int(m)
+        for m in _CITATION_RE.finditer(text):
+            idx = int(m.group(1))
             if idx < 1 or idx > n_sources:
                 return False
         return True
 
-    def generate_answer(self, question: str, system_rules: str, sources: str) -> str:
-        messages = [
+    @staticmethod
+    def _build_messages(question: str, system_rules: str, sources: str) -> List[Dict[str, str]]:
+        return [
             {"role": "system", "content": system_rules},
             {
                 "role": "user",
@@ -92,9 +99,24 @@ class RagService:
                 ),
             },
         ]
+
+    def generate_answer(self, question: str, system_rules: str, sources: str) -> str:
         resp = self._openai.chat.completions.create(
             model=self._chat_model,
-            messages=messages,
+            messages=self._build_messages(question, system_rules, sources),
             temperature=0.2,
         )
         return resp.choices[0].message.content or ""
+
+    def stream_answer(self, question: str, system_rules: str, sources: str) -> Iterator[str]:
+        """Yield answer text deltas as the model produces them."""
+        stream = self._openai.chat.completions.create(
+            model=self._chat_model,
+            messages=self._build_messages(question, system_rules, sources),
+            temperature=0.2,
+            stream=True,
+        )
+        for event in stream:
+            delta = event.choices[0].delta.content if event.choices else None
+            if delta:
+                yield delta
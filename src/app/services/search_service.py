@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Optional
 from openai import OpenAI
 from supabase import Client
 
+from services.vector_backend import VectorSearchBackend
+
 
 class SearchService:
     def __init__(
@@ -15,24 +17,21 @@ class SearchService:
         embedding_model: str,
         rpc_match_fn: str,
     ) -> None:
-        self._supabase = supabase
-        self._openai = openai_client
-        self._embedding_model = embedding_model
-        self._rpc_match_fn = rpc_match_fn
+        self._backend = VectorSearchBackend(
+            supabase,
+            openai_client,
+            embedding_model=embedding_model,
+            rpc_match_fn=rpc_match_fn,
+        )
 
     def list_documents(self, limit: int = 1000) -> List[Dict[str, Any]]:
-        res = (
-            self._supabase.table("cao_documents")
-            .select("cao_id,cao_name,processed_at")
-            .order("cao_name")
-            .limit(limit)
-            .execute()
-        )
-        return res.data or []
+        return self._backend.list_documents(limit)
 
     def embed_query(self, text: str) -> List[float]:
-        resp = self._openai.embeddings.create(model=self._embedding_model, input=text)
-        return resp.data[0].embedding
+        return self._backend.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._backend.embed_queries(texts)
 
     def match_chunks(
         self,
@@ -41,6 +40,4 @@ class SearchService:
         k: int,
         cao_id: Optional[str],
     ) -> List[Dict[str, Any]]:
-        payload = {"query_embedding": query_embedding, "match_count": k, "filter_cao_id": cao_id}
-        res = self._supabase.rpc(self._rpc_match_fn, payload).execute()
-        return res.data or []
+        return self._backend.match_chunks(query_embedding=query_embedding, k=k, cao_id=cao_id)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+from openai import OpenAI
+from supabase import Client
+
+from clients.openai_client import embed_query_cached
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _list_documents_cached(_supabase: Client, limit: int) -> List[Dict[str, Any]]:
+    res = (
+        _supabase.table("cao_documents")
+        .select("cao_id,cao_name,processed_at")
+        .order("cao_name")
+        .limit(limit)
+        .execute()
+    )
+    return res.data or []
+
+
+class VectorSearchBackend:
+    """
+    Shared Supabase/OpenAI plumbing for semantic search: document listing,
+    query embedding and the pgvector match RPC. SearchService and
+    RagService delegate here, so both pages share one cache namespace.
+    """
+
+    def __init__(
+        self,
+        supabase: Client,
+        openai_client: OpenAI,
+        *,
+        embedding_model: str,
+        rpc_match_fn: str,
+    ) -> None:
+        self._supabase = supabase
+        self._openai = openai_client
+        self._embedding_model = embedding_model
+        self._rpc_match_fn = rpc_match_fn
+
+    def list_documents(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        return _list_documents_cached(self._supabase, limit)
+
+    def embed_query(self, text: str) -> List[float]:
+        return embed_query_cached(self._openai, self._embedding_model, text.strip())
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one API call; results keep input order."""
+        if not texts:
+            return []
+        resp = self._openai.embeddings.create(model=self._embedding_model, input=texts)
+        return [d.embedding for d in resp.data]
+
+    def match_chunks(
+        self,
+        *,
+        query_embedding: List[float],
+        k: int,
+        cao_id: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        # pgvector's text literal at 8 significant digits is still roughly
+        # a third the bytes of the JSON float array PostgREST would
+        # otherwise build, while staying within float32 round-trip error;
+        # the cast to vector happens server-side on the RPC argument.
+        embedding = "[" + ",".join(f"{x:.8g}" for x in query_embedding) + "]"
+        payload = {"query_embedding": embedding, "match_count": k, "filter_cao_id": cao_id}
+        res = self._supabase.rpc(self._rpc_match_fn, payload).execute()
+        return res.data or []
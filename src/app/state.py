@@ -3,12 +3,13 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
+import pyarrow as pa
 import streamlit as st
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppState:
     """
     Centralized session state keys (single source of truth).
@@ -44,10 +45,17 @@ def ensure_state() -> None:
             st.session_state[k] = v
 
 
-def set_last_search(query: str, cao_id: Optional[str], results: list) -> None:
+def set_last_search(query: str, cao_id: Optional[str], results: List[Dict[str, Any]]) -> None:
     st.session_state["last_query"] = query
     st.session_state["last_cao_filter"] = cao_id
-    st.session_state["last_results"] = results
+    # Columnar storage: an Arrow table keeps the result set in a handful of
+    # buffers instead of one dict per row. pyarrow ships with Streamlit.
+    st.session_state["last_results"] = pa.Table.from_pylist(results) if results else None
+
+
+def get_last_results() -> List[Dict[str, Any]]:
+    table = st.session_state.get("last_results")
+    return table.to_pylist() if table is not None else []
 
 
 def set_last_rag(question: str, answer: str) -> None:
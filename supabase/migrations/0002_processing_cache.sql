@@ -0,0 +1,13 @@
+-- Cache columns so reprocessing can skip unchanged documents and chunks
+
+-- Hash of the file that was last fully processed; compared against
+-- file_sha256 to short-circuit unchanged documents.
+alter table public.cao_documents
+    add column if not exists processed_sha256 text;
+
+-- Fingerprint of chunk_content, used to reuse embeddings for identical
+-- chunks (shared boilerplate across CAO PDFs) instead of re-embedding.
+alter table public.cao_chunks
+    add column if not exists content_sha text;
+
+create index if not exists idx_cao_chunks_content_sha on public.cao_chunks(content_sha);
@@ -0,0 +1,17 @@
+-- Batched chunk counts: one GROUP BY round-trip instead of one
+-- count="exact" query per cao_id (N+1 on the Documents page).
+create or replace function public.cao_chunk_counts(ids text[])
+returns table (
+    cao_id text,
+    chunk_count bigint
+)
+language sql
+stable
+as $$
+    select
+        c.cao_id,
+        count(*) as chunk_count
+    from public.cao_chunks c
+    where c.cao_id = any(ids)
+    group by c.cao_id;
+$$;